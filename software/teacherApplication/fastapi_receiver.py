@@ -3,6 +3,13 @@
 Run with:
     uvicorn software.teacherApplication.fastapi_receiver:app --reload
 
+For classroom use, install ``uvicorn[standard]`` (uvloop + httptools) and run without
+reload, per-request access logging or per-message deflate (frames are a few hundred
+bytes, so compressing each one per client costs more than it saves):
+    uvicorn software.teacherApplication.fastapi_receiver:app \
+        --loop uvloop --http httptools --ws websockets --no-access-log \
+        --ws-per-message-deflate false --ws-ping-interval 20 --ws-ping-timeout 20
+
 Environment variables:
     SERIAL_PORT   - Optional explicit serial port (e.g. COM5 or /dev/ttyACM0).
     TABLE_RANGE   - Optional inclusive range formatted as "start-end" (default "1-50").
@@ -11,26 +18,38 @@ Environment variables:
 from __future__ import annotations
 
 import asyncio
+import bisect
+import gzip
+import hashlib
+import json
 import logging
 import os
+import random
+import re
 import threading
 import time
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Dict, List, Optional
+from typing import Annotated, AsyncIterator, Dict, List, Literal, Optional
 
 import serial
 import serial.tools.list_ports
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field, root_validator
+from serial.tools.list_ports_common import ListPortInfo
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from pydantic import BaseModel, Field, model_validator
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 LOGGER = logging.getLogger("receiver.web")
 
-COLOR_CODE = {0: "green", 1: "orange", 2: "red"}
+COLOR_NAMES = ("green", "orange", "red")  # indexed by the micro:bit color id
+COLOR_CODE = dict(enumerate(COLOR_NAMES))
 COLOR_NAME_TO_ID = {value: key for key, value in COLOR_CODE.items()}
 VALID_COLORS = set(COLOR_NAME_TO_ID.keys())
+TEACHER_COMMAND = b"T,%d,%d\n"  # table, color id
+RESET_COMMAND = b"T,-1,0\n"
+PACKET_PATTERN = re.compile(rb"([^,]*),(-?\d+),(\d+)")  # role,table,color
+SNAPSHOT_MARKER = object()  # queued in place of a dropped backlog; relays send a fresh snapshot
 HTML_PAGE = """<!DOCTYPE html>
 <html lang=\"en\">
 <head>
@@ -415,37 +434,90 @@ const endTableInput = document.getElementById('endTable');
 const applyRangeBtn = document.getElementById('applyRange');
 const resetAllBtn = document.getElementById('resetAll');
 const redList = document.getElementById('redList');
-const COLOR_SEQUENCE = ['green', 'orange', 'red'];
+const COLOR_SEQUENCE = ['green', 'orange', 'red'];  // indexed by the color id used in deltas
 const NEXT_COLOR = { green: 'orange', orange: 'red', red: 'green' };
+const RED_LIST_LIMIT = 10;
 let tables = new Map();
+let cards = new Map();
+let redSince = new Map();
+let colorCounts = { green: 0, orange: 0, red: 0 };
 let autoSerialPrompted = false;
 
 function upsertCard(data) {
+    const previousColor = tables.get(data.table);
+    if (previousColor !== data.color) {
+        if (previousColor) colorCounts[previousColor] -= 1;
+        colorCounts[data.color] += 1;
+        if (data.color === 'red') {
+            redSince.set(data.table, Date.now());
+        } else {
+            redSince.delete(data.table);
+        }
+    }
     tables.set(data.table, data.color);
-    let card = document.querySelector(`[data-table="${data.table}"]`);
+    let card = cards.get(data.table);
     if (!card) {
         card = document.createElement('article');
         card.className = 'table-card';
         card.dataset.table = data.table;
         grid.appendChild(card);
+        cards.set(data.table, card);
+    } else if (card.dataset.color === data.color) {
+        return card;
     }
     card.dataset.color = data.color;
     card.innerHTML = `<strong>${data.table}</strong><span class="badge ${data.color}">${data.color}</span>`;
+    return card;
+}
+
+function applySnapshot(payload) {
+    // Patch the existing grid in place; only changed, added or removed tables touch the DOM.
+    const seen = new Set();
+    let previous = null;
+    payload.tables.forEach((entry) => {
+        const card = upsertCard(entry);
+        const expected = previous ? previous.nextElementSibling : grid.firstElementChild;
+        if (card !== expected) {
+            grid.insertBefore(card, expected);
+        }
+        previous = card;
+        seen.add(entry.table);
+    });
+    cards.forEach((card, tableId) => {
+        if (!seen.has(tableId)) {
+            card.remove();
+            cards.delete(tableId);
+            tables.delete(tableId);
+        }
+    });
+    colorCounts = { green: 0, orange: 0, red: 0, ...payload.counts };
+    // Start times come on the server's clock; shift them by its "now" onto ours.
+    const offset = Date.now() - payload.now;
+    redSince = new Map(payload.redStarts.map((entry) => [entry.table, entry.since + offset]));
+    updateRangeFields(payload.range);
 }
 
-function renderSnapshot(payload) {
-    grid.innerHTML = '';
-    tables.clear();
-    payload.tables.forEach(upsertCard);
-    updateCounts(payload.counts);
-    updateRangeFields(payload.range);
-    updateRedList(payload.redDurations);
+function applyEvents(events) {
+    events.forEach((payload) => {
+        if (payload.type === 'snapshot') {
+            applySnapshot(payload);
+        } else if (payload.type === 'delta') {
+            upsertCard({ table: payload.t, color: COLOR_SEQUENCE[payload.c] });
+        }
+    });
+    renderSummary();
     stampUpdate();
 }
 
-function updateCounts(counts) {
-    orangeCount.textContent = counts.orange ?? 0;
-    redCount.textContent = counts.red ?? 0;
+function renderSummary() {
+    orangeCount.textContent = colorCounts.orange;
+    redCount.textContent = colorCounts.red;
+    const now = Date.now();
+    const longest = Array.from(redSince)
+        .sort((a, b) => a[1] - b[1] || a[0] - b[0])
+        .slice(0, RED_LIST_LIMIT)
+        .map(([table, since]) => ({ table, seconds: Math.floor((now - since) / 1000) }));
+    updateRedList(longest);
 }
 
 function stampUpdate() {
@@ -602,10 +674,7 @@ async function sendTableUpdate(tableId, color) {
         if (!response.ok || !payload) {
             throw new Error(payload?.detail || 'Failed to update table');
         }
-        upsertCard(payload.table);
-        updateCounts(payload.counts);
-        updateRedList(payload.redDurations);
-        stampUpdate();
+        applyEvents([payload]);
     } catch (error) {
         alert(error.message || 'Unable to update the table.');
     }
@@ -636,7 +705,7 @@ async function applyTableRange() {
             throw new Error(payload?.detail || 'Failed to update table range');
         }
         const payload = await response.json();
-        renderSnapshot(payload);
+        applyEvents([payload]);
     } catch (error) {
         alert(error.message || 'Unable to update table range.');
     }
@@ -647,7 +716,7 @@ async function resetAllTables() {
         const response = await fetch('/api/reset', { method: 'POST' });
         if (!response.ok) throw new Error('Failed to reset tables');
         const payload = await response.json();
-        renderSnapshot(payload);
+        applyEvents([payload]);
     } catch (error) {
         alert(error.message || 'Unable to reset tables.');
     }
@@ -665,14 +734,7 @@ function connectSocket() {
     });
     socket.addEventListener('message', (event) => {
         const payload = JSON.parse(event.data);
-        if (payload.type === 'snapshot') {
-            renderSnapshot(payload);
-        } else if (payload.type === 'table_update') {
-            upsertCard(payload.table);
-            updateCounts(payload.counts);
-            updateRedList(payload.redDurations);
-            stampUpdate();
-        }
+        applyEvents(payload.type === 'batch' ? payload.events : [payload]);
     });
     socket.addEventListener('error', () => {
         socket.close();
@@ -726,6 +788,49 @@ connectSocket();
 </script>
 </body>
 </html>"""
+# The page never changes at runtime, so encode, compress and fingerprint it once.
+HTML_BYTES = HTML_PAGE.encode("utf-8")
+HTML_GZIP = gzip.compress(HTML_BYTES, 6)
+HTML_ETAG = f'"{hashlib.sha256(HTML_BYTES).hexdigest()[:16]}"'
+
+
+# json.dumps() builds a fresh encoder whenever non-default options are passed; reuse one.
+_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def encode_json(payload: Dict[str, object]) -> str:
+    """Encode a payload once so it can be shared by every websocket."""
+    return _JSON_ENCODER.encode(payload)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an ``If-None-Match`` list, as conditional GETs require."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an ``Accept-Encoding`` header allows gzip, honouring ``q=0``."""
+    wildcard = None
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name in ("gzip", "x-gzip"):
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return bool(wildcard)
 
 
 def parse_table_range(raw: Optional[str]) -> tuple[int, int]:
@@ -744,122 +849,282 @@ def parse_table_range(raw: Optional[str]) -> tuple[int, int]:
 
 
 class TableState:
-    """Thread-safe store for the latest table colors."""
+    """Store for the latest table colors.
+
+    Every reader and writer runs on the event loop (the serial thread only queues
+    packets), so no lock is needed. Each table maps to a ``(color, red_started)``
+    pair so one lookup serves both fields, and ``_tables`` is kept in ascending
+    table order so snapshots can be emitted without sorting.
+    """
+
+    _GREEN: tuple[str, Optional[float]] = ("green", None)
 
     def __init__(self, start: int, end: int) -> None:
-        self._lock = threading.Lock()
         self._start = start
         self._end = end
-        self._colors: Dict[int, str] = {table_id: "green" for table_id in range(start, end + 1)}
-        self._red_started: Dict[int, Optional[float]] = {table_id: None for table_id in range(start, end + 1)}
+        self._tables: Dict[int, tuple[str, Optional[float]]] = dict.fromkeys(range(start, end + 1), self._GREEN)
+        self._red_order: List[tuple[float, int]] = []  # (started, table), longest on red first
+        self._color_counts: Dict[str, int] = self._fresh_counts(len(self._tables))
+        self._version = 0
+        self._snapshot_cache: tuple[int, str] = (-1, "")
+
+    def snapshot_json(self) -> str:
+        """Encoded snapshot shared by every reader until the state changes.
+
+        Only the server clock moves between changes, so it is appended at send time.
+        """
+        if self._snapshot_cache[0] != self._version:
+            # Cache the object without its closing brace so the clock can be spliced in.
+            self._snapshot_cache = (self._version, encode_json(self._snapshot_fields())[:-1])
+        return f'{self._snapshot_cache[1]},"now":{self._clock_ms(time.monotonic())}}}'
 
     def snapshot(self) -> Dict[str, object]:
-        with self._lock:
-            return self._snapshot_locked()
-
-    def update_table(self, table: int, color: str) -> Dict[str, object]:
-        with self._lock:
-            if table not in self._colors:
-                self._colors[table] = "green"
-                self._red_started[table] = None
-            self._colors[table] = color
-            if color == "red":
-                if not self._red_started.get(table):
-                    self._red_started[table] = time.time()
-            else:
-                self._red_started[table] = None
-            payload = {
-                "type": "table_update",
-                "table": {"table": table, "color": color},
-                "counts": self._counts_locked(),
-                "range": self._range_locked(),
-                "redDurations": self._red_durations_locked(),
-            }
-        return payload
+        snapshot = self._snapshot_fields()
+        snapshot["now"] = self._clock_ms(time.monotonic())
+        return snapshot
+
+    def update_table(self, table: int, color: str) -> Optional[Dict[str, object]]:
+        """Apply a color change and return its delta event.
+
+        Returns ``None`` when the table already has that color. Dashboards derive
+        counts and red durations locally, so the delta only names the table and
+        its color id.
+        """
+        entry = self._tables.get(table)
+        if entry is not None and entry[0] == color:
+            return None
+        if entry is None:
+            # Tables outside the configured range are rare; re-sort once when one appears.
+            entry = self._tables[table] = self._GREEN
+            self._tables = dict(sorted(self._tables.items()))
+            self._color_counts["green"] += 1
+        previous, started = entry
+        self._color_counts[previous] -= 1
+        self._color_counts[color] += 1
+        if color == "red":
+            if not started:
+                started = time.monotonic()
+                bisect.insort(self._red_order, (started, table))
+        elif started:
+            del self._red_order[bisect.bisect_left(self._red_order, (started, table))]
+            started = None
+        self._tables[table] = (color, started)
+        self._version += 1
+        return self._delta(table, color)
+
+    @property
+    def version(self) -> int:
+        """Bumped on every change, so readers can tell whether a snapshot is still current."""
+        return self._version
+
+    def color(self, table: int) -> str:
+        """Current color of one table; tables outside the range report green."""
+        return self._tables.get(table, self._GREEN)[0]
+
+    def table_payload(self, table: int) -> Dict[str, object]:
+        """Current state of one table, shaped like a ``delta`` event."""
+        color, _ = self._tables.get(table, self._GREEN)
+        return self._delta(table, color)
 
     def reset_all(self) -> Dict[str, object]:
-        with self._lock:
-            for table in self._colors:
-                self._colors[table] = "green"
-                self._red_started[table] = None
-            return self._snapshot_locked()
+        self._tables = dict.fromkeys(self._tables, self._GREEN)
+        self._red_order = []
+        self._color_counts = self._fresh_counts(len(self._tables))
+        self._version += 1
+        return self.snapshot()
 
     def configure_range(self, start: int, end: int) -> Dict[str, object]:
         if start <= 0 or end < start:
             raise ValueError("Invalid table range")
-        with self._lock:
-            self._start = start
-            self._end = end
-            self._colors = {table_id: "green" for table_id in range(start, end + 1)}
-            self._red_started = {table_id: None for table_id in range(start, end + 1)}
-            return self._snapshot_locked()
-
-    def _counts_locked(self) -> Dict[str, int]:
-        counts = Counter(self._colors.values())
-        return {
-            "green": counts.get("green", 0),
-            "orange": counts.get("orange", 0),
-            "red": counts.get("red", 0),
-        }
-
-    def _red_durations_locked(self, limit: int = 10) -> List[Dict[str, int]]:
-        now = time.time()
-        durations = [
-            {"table": table_id, "seconds": int(now - started)}
-            for table_id, started in self._red_started.items()
-            if started
-        ]
-        durations.sort(key=lambda entry: entry["seconds"], reverse=True)
-        return durations[:limit]
-
-    def _range_locked(self) -> Dict[str, int]:
-        return {"start": self._start, "end": self._end}
-
-    def _snapshot_locked(self) -> Dict[str, object]:
+        self._start = start
+        self._end = end
+        # Tables that stay in range keep their state; only the added/removed ones touch the tallies.
+        tables = {table_id: self._tables.get(table_id, self._GREEN) for table_id in range(start, end + 1)}
+        for table in self._tables.keys() - tables.keys():
+            color, started = self._tables[table]
+            self._color_counts[color] -= 1
+            if started:
+                del self._red_order[bisect.bisect_left(self._red_order, (started, table))]
+        self._color_counts["green"] += len(tables.keys() - self._tables.keys())
+        self._tables = tables
+        self._version += 1
+        return self.snapshot()
+
+    @staticmethod
+    def _fresh_counts(total: int) -> Dict[str, int]:
+        return {"green": total, "orange": 0, "red": 0}
+
+    def _counts(self) -> Dict[str, int]:
+        return dict(self._color_counts)
+
+    def _snapshot_fields(self) -> Dict[str, object]:
         tables = [
             {"table": table_id, "color": color}
-            for table_id, color in sorted(self._colors.items())
+            for table_id, (color, _) in self._tables.items()
         ]
         return {
             "type": "snapshot",
             "tables": tables,
-            "counts": self._counts_locked(),
-            "range": self._range_locked(),
-            "redDurations": self._red_durations_locked(),
+            "counts": self._counts(),
+            "range": self._range(),
+            "redStarts": self._red_starts(),
         }
 
+    def _red_starts(self) -> List[Dict[str, int]]:
+        # Every red table is listed so dashboards can keep the longest-waiting list
+        # correct as later deltas clear tables from it. Start times are on the
+        # snapshot's ``now`` clock, so clients get the exact red age.
+        return [
+            {"table": table_id, "since": self._clock_ms(started)}
+            for started, table_id in self._red_order
+        ]
+
+    @staticmethod
+    def _clock_ms(timestamp: float) -> int:
+        return round(timestamp * 1000)
+
+    @staticmethod
+    def _delta(table: int, color: str) -> Dict[str, object]:
+        return {"type": "delta", "t": table, "c": COLOR_NAME_TO_ID[color]}
+
+    def _range(self) -> Dict[str, int]:
+        return {"start": self._start, "end": self._end}
+
 
 class WebsocketManager:
-    def __init__(self) -> None:
-        self._connections: List[WebSocket] = []
-        self._lock = asyncio.Lock()
+    """Fans table events out to dashboards, coalescing bursts into batch frames.
+
+    Every connection gets its own bounded channel drained by a relay task, so a
+    stalled dashboard only ever delays itself. When a channel overflows its
+    backlog is discarded and replaced by a marker that makes the relay send a
+    fresh snapshot instead. A client whose send stalls for ``SEND_TIMEOUT_SECONDS``
+    is dropped.
+    """
+
+    BATCH_LIMIT = 64
+    FLUSH_SECONDS = 0.02
+    CHANNEL_SIZE = 32
+    FANOUT_CHUNK = 50
+    SEND_TIMEOUT_SECONDS = 5.0
+
+    def __init__(self, state: TableState) -> None:
+        self._state = state
+        # Only touched by synchronous code on the event loop, so no lock is needed.
+        self._channels: Dict[WebSocket, tuple[asyncio.Queue[object], asyncio.Task[None]]] = {}
+        self._queue: asyncio.Queue[Dict[str, object]] = asyncio.Queue()
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
-        async with self._lock:
-            self._connections.append(websocket)
+        # Every client starts from a full snapshot, sent before the relay exists so the
+        # two never write to the socket at the same time.
+        version = self._state.version
+        if not await self._send(websocket, self._state.snapshot_json()):
+            return
+        channel: asyncio.Queue[object] = asyncio.Queue(maxsize=self.CHANNEL_SIZE)
+        if self._state.version != version:
+            channel.put_nowait(SNAPSHOT_MARKER)  # changes fanned out while the snapshot was in flight
+        self._channels[websocket] = (channel, asyncio.create_task(self._relay(websocket, channel)))
 
     async def disconnect(self, websocket: WebSocket) -> None:
-        async with self._lock:
-            if websocket in self._connections:
-                self._connections.remove(websocket)
-
-    async def broadcast(self, message: Dict[str, object]) -> None:
-        async with self._lock:
-            stale: List[WebSocket] = []
-            for connection in list(self._connections):
+        entry = self._channels.pop(websocket, None)
+        if entry:
+            entry[1].cancel()
+
+    async def close(self) -> None:
+        """Stop every relay and wait for all of them together."""
+        tasks = [task for _, task in self._channels.values()]
+        self._channels.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def broadcast(self, message: Dict[str, object]) -> None:
+        """Queue an event for the next batch; must be called on the event loop."""
+        self._queue.put_nowait(message)
+
+    async def run_broadcaster(self) -> None:
+        """Drain queued events and ship them as one frame per flush window."""
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.FLUSH_SECONDS)  # let a burst pile up behind the first event
+            while len(batch) < self.BATCH_LIMIT:
                 try:
-                    await connection.send_json(message)
-                except Exception:
-                    stale.append(connection)
-            for connection in stale:
-                self._connections.remove(connection)
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            events = self._coalesce(batch)
+            await self._fan_out(encode_json({"type": "batch", "events": events}))
+
+    @staticmethod
+    def _coalesce(batch: List[Dict[str, object]]) -> List[Dict[str, object]]:
+        """Drop events that a later event in the same batch makes redundant.
+
+        A snapshot supersedes everything queued before it, and only the latest delta
+        per table matters. Survivors stay in order of their last occurrence.
+        """
+        for index in range(len(batch) - 1, -1, -1):
+            if batch[index]["type"] == "snapshot":
+                batch = batch[index:]
+                break
+        latest: Dict[object, Dict[str, object]] = {}
+        for event in batch:
+            key = event["t"] if event["type"] == "delta" else event["type"]
+            latest.pop(key, None)
+            latest[key] = event
+        return list(latest.values())
+
+    async def _fan_out(self, frame: str) -> None:
+        channels = [channel for channel, _ in self._channels.values()]
+        for index, channel in enumerate(channels):
+            if index and index % self.FANOUT_CHUNK == 0:
+                await asyncio.sleep(0)  # yield so large audiences don't starve other I/O
+            try:
+                channel.put_nowait(frame)
+            except asyncio.QueueFull:
+                while not channel.empty():
+                    channel.get_nowait()
+                channel.put_nowait(SNAPSHOT_MARKER)
+
+    async def _relay(self, websocket: WebSocket, channel: asyncio.Queue[object]) -> None:
+        while True:
+            frame = await channel.get()
+            if frame is SNAPSHOT_MARKER:
+                frame = self._state.snapshot_json()
+            if not await self._send(websocket, frame):
+                break
+        self._channels.pop(websocket, None)
+
+    async def _send(self, websocket: WebSocket, frame: str) -> bool:
+        """Send one frame; returns ``False`` once the client is gone."""
+        try:
+            await asyncio.wait_for(websocket.send_text(frame), self.SEND_TIMEOUT_SECONDS)
+            return True
+        except WebSocketDisconnect:
+            pass
+        except Exception as exc:
+            # A broken or stalled transport; close it so the endpoint's receive loop ends as well.
+            LOGGER.debug("Dropping websocket client: %r", exc)
+            try:
+                await asyncio.wait_for(websocket.close(), self.SEND_TIMEOUT_SECONDS)
+            except Exception:
+                pass
+        return False
 
 
 class SerialReceiver:
-    """Bridges micro:bit serial data into the web application."""
+    """Bridges micro:bit serial data into the web application.
 
-    RETRY_SECONDS = 3
+    The worker thread only reads and parses; each chunk's decoded ``(table, color)``
+    packets are handed to the event loop in one callback that applies them to the state.
+    """
+
+    RETRY_INITIAL_SECONDS = 0.2
+    RETRY_MAX_SECONDS = 5.0
+    READ_TIMEOUT = 0.05
+    WRITE_TIMEOUT = 0.1  # writes run on the event loop; a wedged port must not stall it
+    RX_BUFFER_SIZE = 65536
+    MAX_LINE_BYTES = 256
+    PORTS_CACHE_SECONDS = 1.0
 
     def __init__(self, state: TableState, ws_manager: WebsocketManager) -> None:
         self._state = state
@@ -869,9 +1134,12 @@ class SerialReceiver:
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._connection_lock = threading.Lock()
         self._connection: Optional[serial.Serial] = None
+        self._ports_lock = threading.Lock()
+        self._ports_cache: tuple[float, List[ListPortInfo]] = (float("-inf"), [])
 
         self._configured_port = os.getenv("SERIAL_PORT")
         self._active_port: Optional[str] = None
+        self._detected_port: Optional[str] = None
         self._baud = int(os.getenv("BAUD_RATE", "115200"))
 
     def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
@@ -900,6 +1168,7 @@ class SerialReceiver:
     def set_port(self, port: Optional[str]) -> None:
         normalized = (port or "").strip() or None
         self._configured_port = normalized
+        self._detected_port = None
         LOGGER.info("Configured serial port set to %s", normalized or "auto-detect")
         self._force_reconnect()
 
@@ -911,99 +1180,147 @@ class SerialReceiver:
         }
 
     def send_teacher_command(self, table: int, color: str) -> None:
-        color_id = COLOR_NAME_TO_ID[color]
-        message = f"T,{table},{color_id}\n".encode("utf-8")
-        with self._connection_lock:
-            if not self._connection or not self._connection.is_open:
-                raise RuntimeError("Serial link is not connected.")
-            self._connection.write(message)
-            LOGGER.info("Sent teacher command for table %s -> %s", table, color)
+        self._write(TEACHER_COMMAND % (table, COLOR_NAME_TO_ID[color]))
+        LOGGER.info("Sent teacher command for table %s -> %s", table, color)
 
     def reset_all(self) -> None:
-        message = "T,-1,0\n".encode("utf-8")
+        self._write(RESET_COMMAND)
+        LOGGER.info("Sent reset command")
+
+    def _write(self, message: bytes) -> None:
         with self._connection_lock:
             if not self._connection or not self._connection.is_open:
                 raise RuntimeError("Serial link is not connected.")
-            self._connection.write(message)
-            LOGGER.info("Sent reset command")
+            try:
+                self._connection.write(message)
+            except serial.SerialTimeoutException as exc:
+                raise RuntimeError("Serial link is not accepting data.") from exc
+            except serial.SerialException as exc:
+                raise RuntimeError(f"Serial write failed: {exc}") from exc
 
     def _worker(self) -> None:
+        backoff = self.RETRY_INITIAL_SECONDS
         while not self._stop_event.is_set():
             port = self._resolve_port()
             if not port:
                 LOGGER.info("Waiting for micro:bit receiver...")
-                time.sleep(self.RETRY_SECONDS)
+                backoff = self._wait_to_retry(backoff)
                 continue
             try:
-                with serial.Serial(port, self._baud, timeout=1) as connection:
+                with serial.Serial(
+                    port, self._baud, timeout=self.READ_TIMEOUT, write_timeout=self.WRITE_TIMEOUT
+                ) as connection:
                     LOGGER.info("Connected to %s", port)
+                    self._tune_connection(connection)
                     with self._connection_lock:
                         self._connection = connection
                         self._active_port = port
+                    backoff = self.RETRY_INITIAL_SECONDS
                     self._read_loop(connection)
             except serial.SerialException as exc:
                 LOGGER.warning("Serial error on %s: %s", port, exc)
+                self._detected_port = None
             finally:
                 with self._connection_lock:
                     self._connection = None
                     self._active_port = None
-                time.sleep(self.RETRY_SECONDS)
+                backoff = self._wait_to_retry(backoff)
+
+    def _wait_to_retry(self, backoff: float) -> float:
+        """Sleep for ``backoff`` (+/-20% jitter) unless stopped; returns the next delay."""
+        self._stop_event.wait(backoff * random.uniform(0.8, 1.2))
+        return min(backoff * 2, self.RETRY_MAX_SECONDS)
+
+    def _tune_connection(self, connection: serial.Serial) -> None:
+        if hasattr(connection, "set_buffer_size"):  # Windows only
+            connection.set_buffer_size(rx_size=self.RX_BUFFER_SIZE)
+        # USB-serial adapters may hold short packets for up to ~16 ms unless asked not to.
+        # Windows needs nothing extra: pyserial derives COMMTIMEOUTS from READ_TIMEOUT.
+        try:
+            connection.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, OSError, ValueError) as exc:
+            LOGGER.debug("Low-latency mode unavailable on %s: %s", connection.port, exc)
 
     def _read_loop(self, connection: serial.Serial) -> None:
+        buffer = bytearray()
         while not self._stop_event.is_set():
             try:
-                raw = connection.readline().decode("utf-8", errors="ignore").strip()
+                # Take whatever the driver already holds in one call instead of a byte at a time.
+                chunk = connection.read(connection.in_waiting or 1)
             except Exception as exc:
                 LOGGER.warning("Failed to read serial data: %s", exc)
+                self._detected_port = None  # the device may come back under another name
                 break
-            if not raw:
+            if not chunk:
                 continue
-            payload = self._parse_message(raw)
-            if not payload:
+            buffer += chunk
+            if b"\n" not in chunk:
+                if len(buffer) > self.MAX_LINE_BYTES:
+                    buffer.clear()  # line noise without a terminator; resync on the next newline
                 continue
-            table, color = payload
+            *lines, remainder = buffer.split(b"\n")
+            buffer = bytearray(remainder)
+            packets: List[tuple[int, str]] = []
+            for line in lines:
+                raw = line.strip()
+                payload = self._parse_message(raw) if raw else None
+                if payload:
+                    packets.append(payload)
+            if packets and self._loop:
+                self._loop.call_soon_threadsafe(self._apply_packets, packets)
+
+    def _apply_packets(self, packets: List[tuple[int, str]]) -> None:
+        # Runs on the event loop.
+        for table, color in packets:
             update = self._state.update_table(table, color)
-            if self._loop:
-                asyncio.run_coroutine_threadsafe(self._ws_manager.broadcast(update), self._loop)
+            if update is not None:
+                self._ws_manager.broadcast(update)
 
-    def _parse_message(self, raw: str) -> Optional[tuple[int, str]]:
-        parts = raw.split(",")
-        if len(parts) != 3:
-            LOGGER.debug("Ignoring malformed packet: %s", raw)
+    def _parse_message(self, raw: bytes) -> Optional[tuple[int, str]]:
+        match = PACKET_PATTERN.fullmatch(raw)
+        if not match:
+            LOGGER.debug("Ignoring malformed packet: %r", raw)
             return None
-        role, table_str, color_str = parts
-        if role == "RT":  # echo of our own teacher command
+        role, table_str, color_str = match.groups()
+        if role == b"RT":  # echo of our own teacher command
             return None
-        try:
-            table = int(table_str)
-            color_index = int(color_str)
-        except ValueError:
-            LOGGER.debug("Invalid numeric values in packet: %s", raw)
+        color_index = int(color_str)
+        if color_index >= len(COLOR_NAMES):
+            LOGGER.debug("Unknown color index in packet: %r", raw)
             return None
-        color = COLOR_CODE.get(color_index)
-        if not color:
-            LOGGER.debug("Unknown color index in packet: %s", raw)
-            return None
-        return table, color
+        return int(table_str), COLOR_NAMES[color_index]
 
     def _resolve_port(self) -> Optional[str]:
         if self._configured_port:
             return self._configured_port
-        for port in serial.tools.list_ports.comports():
+        if self._detected_port:  # reuse the last match; cleared again whenever the link fails
+            return self._detected_port
+        for port in self._list_ports():
             description = (port.description or "").lower()
             if "microbit" in description or "mbed" in description or "cdc" in description:
+                self._detected_port = port.device
                 return port.device
         return None
 
     def _enumerate_ports(self) -> List[Dict[str, str]]:
         ports: List[Dict[str, str]] = []
-        for port in serial.tools.list_ports.comports():
+        for port in self._list_ports():
             ports.append({
                 "device": port.device,
                 "description": port.description or "Unknown",
             })
         return ports
 
+    def _list_ports(self) -> List[ListPortInfo]:
+        # Port enumeration walks the OS device tree; the dashboard can poll faster than that is worth.
+        with self._ports_lock:
+            stamp, ports = self._ports_cache
+            now = time.monotonic()
+            if now - stamp >= self.PORTS_CACHE_SECONDS:
+                ports = list(serial.tools.list_ports.comports())
+                self._ports_cache = (now, ports)
+            return ports
+
     def _force_reconnect(self) -> None:
         with self._connection_lock:
             if self._connection and self._connection.is_open:
@@ -1016,7 +1333,7 @@ class SerialReceiver:
 
 
 class TableUpdateRequest(BaseModel):
-    color: str = Field(pattern="^(green|orange|red)$")
+    color: Literal["green", "orange", "red"]
 
 
 class SerialConfigRequest(BaseModel):
@@ -1027,34 +1344,37 @@ class SerialConfigRequest(BaseModel):
 
 
 class TableRangeRequest(BaseModel):
-    start: int = Field(ge=1, description="First table identifier (inclusive).")
-    end: int = Field(ge=1, description="Last table identifier (inclusive).")
-
-    @root_validator(skip_on_failure=True)
-    def ensure_valid_range(cls, values: Dict[str, int]) -> Dict[str, int]:
-        start = values.get("start")
-        end = values.get("end")
-        if start is None or end is None:
-            return values
-        if end < start:
+    start: Annotated[int, Field(ge=1, description="First table identifier (inclusive).")]
+    end: Annotated[int, Field(ge=1, description="Last table identifier (inclusive).")]
+
+    @model_validator(mode="after")
+    def ensure_valid_range(self) -> TableRangeRequest:
+        if self.end < self.start:
             raise ValueError("end must be greater than or equal to start")
-        return values
+        return self
 
 
 start_table, end_table = parse_table_range(os.getenv("TABLE_RANGE"))
 table_state = TableState(start_table, end_table)
-ws_manager = WebsocketManager()
+ws_manager = WebsocketManager(table_state)
 serial_receiver = SerialReceiver(table_state, ws_manager)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     loop = asyncio.get_running_loop()
+    # Only port enumeration is offloaded to threads; the stock pool would size itself for the CPU count.
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=2, thread_name_prefix="receiver"))
     serial_receiver.bind_loop(loop)
     serial_receiver.start()
+    background = [asyncio.create_task(ws_manager.run_broadcaster())]
     try:
         yield
     finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await ws_manager.close()
         serial_receiver.stop()
 
 
@@ -1062,66 +1382,76 @@ app = FastAPI(title="Classroom Indicator Lights Receiver", lifespan=lifespan)
 
 
 @app.get("/", response_class=HTMLResponse)
-async def root() -> str:
-    return HTML_PAGE
+async def root(request: Request) -> Response:
+    headers = {"ETag": HTML_ETAG, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match", ""), HTML_ETAG):
+        return Response(status_code=304, headers=headers)
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(HTML_GZIP, media_type="text/html; charset=utf-8", headers=headers)
+    return Response(HTML_BYTES, media_type="text/html; charset=utf-8", headers=headers)
 
 
 @app.get("/api/status")
-async def api_status() -> Dict[str, object]:
-    return table_state.snapshot()
+async def api_status() -> Response:
+    return Response(table_state.snapshot_json(), media_type="application/json")
 
 
 @app.post("/api/table/{table_id}")
-async def api_update_table(table_id: int, request: TableUpdateRequest) -> Dict[str, object]:
-    update = table_state.update_table(table_id, request.color)
+async def api_update_table(table_id: int, request: TableUpdateRequest) -> JSONResponse:
+    # Always send, even for the current color: it lets a teacher resend a command the radio
+    # lost. State only changes once the send has succeeded.
     if serial_receiver:
         try:
-            await asyncio.to_thread(serial_receiver.send_teacher_command, table_id, request.color)
+            # A handful of bytes into the driver's TX buffer; cheaper inline than via a thread hop.
+            serial_receiver.send_teacher_command(table_id, request.color)
         except RuntimeError as exc:
             raise HTTPException(status_code=503, detail=str(exc)) from exc
-    await ws_manager.broadcast(update)
-    return update
+    update = table_state.update_table(table_id, request.color)
+    if update is None:  # already that color: nothing to tell the dashboards
+        return JSONResponse(table_state.table_payload(table_id))
+    ws_manager.broadcast(update)
+    return JSONResponse(update)
 
 
 @app.post("/api/reset")
-async def api_reset() -> Dict[str, object]:
-    snapshot = table_state.reset_all()
+async def api_reset() -> JSONResponse:
     if serial_receiver:
         try:
-            await asyncio.to_thread(serial_receiver.reset_all)
+            serial_receiver.reset_all()
         except RuntimeError as exc:
             raise HTTPException(status_code=503, detail=str(exc)) from exc
-    await ws_manager.broadcast(snapshot)
-    return snapshot
+    snapshot = table_state.reset_all()
+    ws_manager.broadcast(snapshot)
+    return JSONResponse(snapshot)
 
 
 @app.post("/api/table-range")
-async def api_table_range(request: TableRangeRequest) -> Dict[str, object]:
+async def api_table_range(request: TableRangeRequest) -> JSONResponse:
     try:
         snapshot = table_state.configure_range(request.start, request.end)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    await ws_manager.broadcast(snapshot)
-    return snapshot
+    ws_manager.broadcast(snapshot)
+    return JSONResponse(snapshot)
 
 
 @app.get("/api/serial")
 async def api_serial_status() -> Dict[str, object]:
-    return serial_receiver.serial_status()
+    return await asyncio.to_thread(serial_receiver.serial_status)
 
 
 @app.post("/api/serial")
 async def api_serial_config(request: SerialConfigRequest) -> Dict[str, object]:
     desired_port = (request.port or "").strip() or None
     serial_receiver.set_port(desired_port)
-    return serial_receiver.serial_status()
+    return await asyncio.to_thread(serial_receiver.serial_status)
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket) -> None:
     await ws_manager.connect(websocket)
     try:
-        await websocket.send_json(table_state.snapshot())
         while True:
             await websocket.receive_text()  # clients are read-only; ignore payloads
     except WebSocketDisconnect:
@@ -1135,4 +1465,15 @@ if __name__ == "__main__":
 
     host = os.getenv("API_HOST", "0.0.0.0")
     port = int(os.getenv("API_PORT", "8000"))
-    uvicorn.run(app, host=host, port=port)
+    # loop/http "auto" pick uvloop and httptools whenever they are installed.
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        loop="auto",
+        http="auto",
+        access_log=False,
+        ws_per_message_deflate=False,
+        ws_ping_interval=20.0,
+        ws_ping_timeout=20.0,
+    )
@@ -1,131 +1,253 @@
 import tkinter as tk
 from tkinter import ttk
+import os
 import serial
-import threading
 import time
+import threading
+from array import array
+from collections import deque
+from operator import itemgetter
 import serial.tools.list_ports
+from serial.threaded import Protocol, ReaderThread
+
+# Colors are stored and sent as their index in COLOR_NAMES
+COLOR_NAMES = ('green', 'orange', 'red')
+GREEN, ORANGE, RED = range(3)
+NEXT_COLOR = (ORANGE, RED, GREEN)  # Click cycle: green -> orange -> red -> green
+
+TEACHER_COMMAND = b"T,%d,%d\n"  # Table number, color id
+RESET_COMMAND = b"T,-1,0\n"
+MAX_LINE_BYTES = 256  # Longer unterminated input is line noise and gets dropped
+RESET_PAUSE = 0.01  # Seconds to hold further messages after a reset to not flood the airwaves
+
+DEBUG = False  # Print every received line, table change and sent message
+
+class TrafficLightReader(Protocol):
+    # pyserial's reader thread blocks until data arrives and hands us whatever it read
+    def connection_made(self, transport):
+        self.transport = transport
+        self.pending = b''
+
+    def data_received(self, data):
+        self.pending = receive_serial_data(self.pending, data)
+
+    def connection_lost(self, exc):
+        global reader
+        if reader is self.transport:
+            reader = None  # The thread has ended (e.g. the device was unplugged)
+        self.transport = None  # Not calling the base class; it re-raises exc on the reader thread
+        if exc:
+            print(f"Error reading serial data: {exc}")
+
+def on_serial_readable(fd, mask):
+    global rx_pending
+    # Called by Tk's event loop when the port has data; pyserial opens it non-blocking
+    try:
+        chunk = os.read(fd, 4096)
+    except BlockingIOError:
+        return
+    except OSError as e:
+        chunk = b''
+        print(f"Error reading serial data: {e}")
+    if not chunk:  # Device unplugged; stop watching so Tk doesn't spin on the dead fd
+        stop_watching_serial()
+        return
+    rx_pending = receive_serial_data(rx_pending, chunk)
+
+def receive_serial_data(pending, chunk):
+    # Shared by both receive paths: handles every complete line and returns the unterminated
+    # rest. The protocol is plain ASCII, so lines are parsed as bytes without decoding them.
+    *lines, pending = (pending + chunk).split(b'\n')
+    if len(pending) > MAX_LINE_BYTES:
+        pending = b''  # No terminator in sight; resync on the next newline
+    for line in lines:
+        handle_serial_line(line.strip())
+    return pending
+
+def stop_watching_serial():
+    global serial_fd
+    if serial_fd is not None:
+        root.tk.deletefilehandler(serial_fd)
+        serial_fd = None
+
+def handle_serial_line(line):
+    if not line:
+        return
+
+    if line.startswith(b'RT,'):
+        # Echoes of our own messages are common; drop them before any parsing
+        if DEBUG:
+            print("repeat of own message, ignoring")
+        return
+
+    if DEBUG:
+        print(f"Received: {line.decode('ascii', 'replace')}")  # Debug: print the raw input
+    parts = line.split(b',')
+
+    if len(parts) != 3:
+        print("Invalid message format")
+        return
+
+    _, table_str, color_str = parts
+    #print(type(room))
+    #room = room[1:] if room.startswith('R') else room
+
+    # Check if the room is selected
+    #if not room_filters[room].get():
+    #    print(f"Room {room} is not selected, ignoring message.")
+    #    return
 
-def process_serial_data():
-    global ser
-    while True:
-        if ser is None:
-            time.sleep(0.1)  # Add a small delay to prevent CPU overload
-            continue
-        try:
-            line = ser.readline().decode('utf-8').strip()  # Wait for a full linefeed (\r\n)
-            if not line:
-                continue
-
-            print(f"Received: {line}")  # Debug: print the raw input
-            parts = line.split(',')
-
-            if len(parts) != 3:
-                print("Invalid message format")
-                continue
-
-            role, table_str, color_str = parts
-            #print(type(room))
-            #room = room[1:] if room.startswith('R') else room
-
-            # Check if the room is selected
-            #if not room_filters[room].get():
-            #    print(f"Room {room} is not selected, ignoring message.")
-            #    continue
-
-            if ((start_table > int(table_str)) or (int(table_str) > end_table)):
+    try:
+        table_number = int(table_str)
+        if not (start_table <= table_number < end_table):
+            if DEBUG:
                 print("Table number outside of selected range, ignoring")
-                continue
-
-            if role == 'RT':
-                print("repeat of own message, ignoring")
-                continue
-
-            try:
-                table_index = int(table_str) - start_table  # Adjust for dynamic table range
-                color_id = int(color_str)
+            return
 
-                if 0 <= table_index < len(canvases):
-                    root.after(0, update_table_color_from_serial, table_index, color_id)  # Use after() for safe updates
-                else:
-                    print(f"Invalid TableNr: {table_str}")
+        color_id = int(color_str)
 
-            except ValueError:
-                print("Non-integer TableNr or ColorID")
+        # Latest color per table wins; the Tk thread applies the batch in flush_serial_updates.
+        # Keyed by table number because the range (and with it every index) may change before
+        # the flush. This may run on the reader thread, so the only Tk call is the wakeup below,
+        # made once per batch; event_generate is safe to call from other threads.
+        with pending_lock:
+            wake = not pending_updates
+            pending_updates[table_number] = color_id
+        if wake:
+            root.event_generate('<<SerialUpdates>>', when='tail')
 
-        except Exception as e:
-            print(f"Error reading serial data: {e}")
+    except ValueError:
+        print("Non-integer TableNr or ColorID")
 
 def update_table_color_from_serial(index, color_id):
-    colors = {0: 'green', 1: 'orange', 2: 'red'}
-    new_color = colors.get(color_id, None)
+    if color_id == table_colors[index]:
+        return  # Repeated state, e.g. a periodic rebroadcast; nothing to redraw
 
-    if new_color:
-        print(f"Updating table {index + start_table} to color {new_color}")  # Debug statement
+    if 0 <= color_id < len(COLOR_NAMES):
+        if DEBUG:
+            print(f"Updating table {index + start_table} to color {COLOR_NAMES[color_id]}")  # Debug statement
         current_color = table_colors[index]
 
-        if new_color == 'red' and current_color != 'red':
+        if color_id == RED and current_color != RED:
             red_start_time[index] = time.time()
-        elif new_color != 'red':
+            red_set.add(index)
+        elif color_id != RED:
             red_start_time[index] = None
+            red_set.discard(index)
 
-        canvases[index].itemconfig('table', fill=new_color)
-        table_colors[index] = new_color
+        canvases[index].itemconfig(rect_ids[index], fill=COLOR_NAMES[color_id])
+        table_colors[index] = color_id
     else:
         print(f"Invalid ColorID: {color_id}")
 
+def flush_serial_updates():
+    global pending_updates
+    with pending_lock:
+        updates = pending_updates
+        pending_updates = {}
+    for table_number, color_id in updates.items():
+        index = table_number - start_table  # Adjust for dynamic table range
+        if 0 <= index < len(canvases):  # The range may have changed since the line was received
+            update_table_color_from_serial(index, color_id)
+
 def cycle_table_color(index):
     global ser, start_table
     current_color = table_colors[index]
-    next_color = {'green': 'orange', 'orange': 'red', 'red': 'green'}.get(current_color, 'green')
-    print(f"Table {index + start_table} clicked! Changing color from {current_color} to {next_color}")
-    if next_color == 'red' and current_color != 'red':
+    next_color = NEXT_COLOR[current_color]
+    if DEBUG:
+        print(f"Table {index + start_table} clicked! Changing color from {COLOR_NAMES[current_color]} to {COLOR_NAMES[next_color]}")
+    if next_color == RED:
         red_start_time[index] = time.time()
-    elif next_color != 'red':
+        red_set.add(index)
+    else:
         red_start_time[index] = None
+        red_set.discard(index)
 
-    canvases[index].itemconfig('table', fill=next_color)
+    canvases[index].itemconfig(rect_ids[index], fill=COLOR_NAMES[next_color])
     table_colors[index] = next_color
 
     # Send "hooray" over serial if connected
     if ser and ser.is_open:
-        try:
-            colorCode = {'green': '0', 'orange': '1', 'red': '2'}.get(next_color)
-            msg = "T," + str(index + start_table) + "," + str(colorCode) + "\n"
-            ser.write(msg.encode())  # Send "hooray" followed by a newline
-            print("Sent " + msg + " over serial")
-        except Exception as e:
-            print(f"Error sending data: {e}")
+        queue_serial_message(TEACHER_COMMAND % (index + start_table, next_color))
+
+def on_table_click(event):
+    # Shared by every table canvas; the table number survives range changes, the index does not
+    cycle_table_color(event.widget.table_number - start_table)
 
 def reset_all_green():
     global ser, start_table, end_table, canvases, table_colors
     if ser and ser.is_open:
         for index in range(start_table, end_table):
 
-            canvases[index - start_table].itemconfig('table', fill='green')
-            table_colors[index - start_table] = 'green'
+            canvases[index - start_table].itemconfig(rect_ids[index - start_table], fill='green')
+            table_colors[index - start_table] = GREEN
+            red_start_time[index - start_table] = None
+        red_set.clear()
 
         # Send "hooray" over serial if connected
-        msg = "T,-1,0\n"
-        try:
-            ser.write(msg.encode())  # Send "hooray" followed by a newline
-            print("Sent " + msg + " over serial")
-        except Exception as e:
-            print(f"Error sending data: {e}")
-        time.sleep(0.01) #sleep 10 milliseconds to not flood the airwaves
+        queue_serial_message(RESET_COMMAND, pause=RESET_PAUSE)
+
+def queue_serial_message(msg, pause=0.0):
+    global tx_scheduled
+    # Messages queued within a few ms of each other go out in a single write
+    tx_queue.append((msg, pause))
+    if not tx_scheduled:
+        tx_scheduled = True
+        root.after(5, flush_serial_output)
+
+def flush_serial_output():
+    global tx_scheduled, next_send_ok
+    wait = next_send_ok - time.monotonic()
+    if wait > 0:
+        # Still pacing after a reset; the timer replaces the old blocking sleep
+        root.after(int(wait * 1000) + 1, flush_serial_output)
+        return
+
+    # Send everything up to and including the first message that asks for a pause
+    batch = []
+    pause = 0.0
+    while tx_queue and not pause:
+        msg, pause = tx_queue.popleft()
+        batch.append(msg)
+    if pause:
+        next_send_ok = time.monotonic() + pause
+    if tx_queue:
+        root.after(int(pause * 1000) + 1, flush_serial_output)
+    else:
+        tx_scheduled = False
 
+    data = b''.join(batch)
+    if not data or not (ser and ser.is_open):
+        return
+    try:
+        ser.write(data)  # Send "hooray" followed by a newline
+        if DEBUG:
+            print("Sent " + data.decode() + " over serial")
+    except Exception as e:
+        print(f"Error sending data: {e}")
 
 
 def update_longest_red_list():
+    global red_list_rows
     current_time = time.time()
-    durations = [(i, int(current_time - red_start_time[i]) if red_start_time[i] else 0) for i in range(len(canvases))]
-    durations.sort(key=lambda x: x[1], reverse=True)
+    # Only tables that are actually red can appear in the list; sorted so ties keep table order
+    durations = [(i, int(current_time - red_start_time[i])) for i in sorted(red_set)]
+    durations.sort(key=itemgetter(1), reverse=True)
+    rows = [table_labels[index] + str(duration) + 's' for index, duration in durations if duration > 0]
 
     #print("Updating red list with durations:", durations)  # Debug statement
 
-    red_list.delete(0, tk.END)
-    for index, duration in durations:
-        if duration > 0:
-            red_list.insert(tk.END, f"Table {index + start_table}: {duration}s")
+    if rows != red_list_rows:  # Leave the Listbox alone when nothing visible changed
+        # Rewrite only the rows that differ, then trim or extend the tail
+        for position, (row, shown) in enumerate(zip(rows, red_list_rows)):
+            if row != shown:
+                red_list.delete(position)
+                red_list.insert(position, row)
+        if len(rows) < len(red_list_rows):
+            red_list.delete(len(rows), tk.END)
+        if len(rows) > len(red_list_rows):
+            red_list.insert(tk.END, *rows[len(red_list_rows):])  # One Tcl call for all new rows
+        red_list_rows = rows
 
     # Schedule the function to run again
     root.after(1000, update_longest_red_list)
@@ -137,12 +259,25 @@ def refresh_ports():
     print(f"Available ports: {port_list}")  # Debug statement
 
 def connect_to_port():
-    global ser
+    global ser, reader, serial_fd, rx_pending
     selected_port = port_selector.get()
-    if ser is not None:
+    stop_watching_serial()
+    old_reader, reader = reader, None
+    if old_reader is not None:
+        old_reader.close()  # Stops the reader thread and closes its port
+    elif ser is not None:
         ser.close()
     try:
         ser = serial.Serial(selected_port, 115200, timeout=1)  # Updated baudrate
+        if hasattr(root.tk, 'createfilehandler'):
+            # Unix: the Tk event loop wakes on incoming data, so no reader thread is needed
+            rx_pending = b''
+            serial_fd = ser.fileno()
+            root.tk.createfilehandler(serial_fd, tk.READABLE, on_serial_readable)
+        else:
+            # Windows has no file handlers in Tk; fall back to pyserial's reader thread
+            reader = ReaderThread(ser, TrafficLightReader)
+            reader.start()
         print(f"Connected to {selected_port}")
     except Exception as e:
         print(f"Error connecting to port {selected_port}: {e}")
@@ -151,16 +286,23 @@ def connect_to_port():
 
 
 def update_table_range():
-    global start_table, end_table, canvases, red_start_time, table_colors
+    global start_table, end_table, canvases, rect_ids, red_start_time, red_set, table_colors, table_labels
     try:
-        start_table = int(start_table_entry.get())
-        end_table = int(end_table_entry.get()) + 1
-        if start_table >= end_table:
+        new_start = int(start_table_entry.get())
+        new_end = int(end_table_entry.get()) + 1
+        if new_start >= new_end:
             print("Start table must be less than end table.")
             return
 
-        for canvas in canvases:
-            canvas.destroy()
+        # Tables that stay in range keep their canvas and state; only the others are destroyed
+        previous = {
+            table: entry
+            for table, entry in zip(range(start_table, end_table), zip(canvases, rect_ids, table_colors, red_start_time))
+        }
+        for table, (canvas, _, _, _) in previous.items():
+            if not (new_start <= table < new_end):
+                canvas.destroy()
+        start_table, end_table = new_start, new_end
             
         # Reset grid configuration for consistent alignment
         #for r in range((end_table - start_table + 1) // 2 + 2):
@@ -173,19 +315,33 @@ def update_table_range():
         pady = 1
 
         canvases = []
-        red_start_time = [None] * (end_table - start_table)
-        table_colors = ['green'] * (end_table - start_table)
+        rect_ids = []  # Rectangle item id per canvas, so updates skip the 'table' tag lookup
+        red_start_time = []
+        red_set = set()  # Indices of tables currently on red
+        table_colors = array('B')  # Color id per table
+        table_labels = []  # "Table N: " prefix for red_list rows
 
         # Adjust grid for numbering from bottom left, up the left column, then down the right column
         total_tables = end_table - start_table
         num_rows = (total_tables) // 2
 
         for i in range(start_table, end_table):
-            canvas = tk.Canvas(root, width=100, height=20, bg='grey')
-            canvas.create_rectangle(10, 5, 90, 20, fill='green', tags='table')
-            canvas.create_text(50, 10, text=f"{i}", fill="white", font=("Helvetica", 10), tags="table_text")
-            canvas.tag_bind('table', '<Button-1>', lambda e, i=i: cycle_table_color(i - start_table))  # Adjust index
+            if i in previous:
+                canvas, rect_id, color_id, started = previous[i]
+            else:
+                canvas = tk.Canvas(root, width=100, height=20, bg='grey')
+                rect_id = canvas.create_rectangle(10, 5, 90, 20, fill='green', tags='table')
+                canvas.create_text(50, 10, text=f"{i}", fill="white", font=("Helvetica", 10), tags="table_text")
+                canvas.table_number = i
+                canvas.tag_bind('table', '<Button-1>', on_table_click)
+                color_id, started = GREEN, None
             canvases.append(canvas)
+            rect_ids.append(rect_id)
+            table_colors.append(color_id)
+            red_start_time.append(started)
+            table_labels.append(f"Table {i}: ")
+            if started:
+                red_set.add(len(canvases) - 1)
 
             # Calculate position for bottom-left numbering
             col = 0 if ((i - start_table + 1) <= (num_rows))  else 1
@@ -200,8 +356,18 @@ def update_table_range():
 start_table = 1
 end_table = 16
 red_start_time = [None] * (end_table - start_table)
-table_colors = ['green'] * (end_table - start_table)
+red_set = set()
+table_colors = array('B', bytes(end_table - start_table))
 ser = None  # Serial connection object
+reader = None  # ReaderThread feeding incoming lines from ser where Tk file handlers are unavailable
+serial_fd = None  # File descriptor of ser while Tk is watching it
+rx_pending = b''  # Incomplete line left over from the last read of serial_fd
+red_list_rows = []  # Rows currently shown in red_list
+tx_queue = deque()  # (message, pause after it) pairs waiting for flush_serial_output
+tx_scheduled = False
+next_send_ok = 0.0  # time.monotonic() before which nothing more is written
+pending_updates = {}  # table number -> latest color_id received by the reader thread
+pending_lock = threading.Lock()
 
 # Set up the tkinter GUI
 root = tk.Tk()
@@ -236,19 +402,19 @@ update_table_button.pack(pady=5)
 
 # Create canvas objects for tables
 canvases = []
+rect_ids = []
+table_labels = []
 update_table_range()
 
 # Listbox to display tables longest on red
 red_list = tk.Listbox(root, height=16, width=25)
 red_list.grid(row=2, column=3, rowspan=10, padx=10, pady=5, sticky='ns')
 
-# Start the serial processing in a separate thread
-thread = threading.Thread(target=process_serial_data)
-thread.daemon = True
-thread.start()
-
 refresh_ports()  # Populate the dropdown with available ports on startup
 
+# Apply serial updates whenever handle_serial_line signals a new batch
+root.bind('<<SerialUpdates>>', lambda e: flush_serial_updates())
+
 # Start updating the red list
 update_longest_red_list()
 